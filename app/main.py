@@ -1,15 +1,16 @@
 import logging
 import time
 from contextlib import asynccontextmanager
-from collections import defaultdict
 from pathlib import Path
 
+from cachetools import TTLCache
+
 from dotenv import load_dotenv
 load_dotenv()  # Must run before any OpenAI client is initialised
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from app.routers import chat, ingest
 
@@ -26,19 +27,29 @@ STORAGE_DIR = Path("storage")
 # ── Rate limiting (in-memory, per IP) ─────────────────────────────────────────
 RATE_LIMIT_REQUESTS = 30
 RATE_LIMIT_WINDOW   = 60
-_rate_store: dict[str, list[float]] = defaultdict(list)
+RATE_LIMIT_MAX_IPS  = 10_000
+RATE_LIMIT_EXEMPT   = {"/health"}
+
+# Token bucket per IP: (tokens, last_refill). Idle IPs expire after two windows,
+# by which point their bucket would have refilled anyway.
+_rate_store: TTLCache[str, tuple[float, float]] = TTLCache(
+    maxsize=RATE_LIMIT_MAX_IPS, ttl=RATE_LIMIT_WINDOW * 2,
+)
 
 def _check_rate_limit(ip: str) -> None:
-    now          = time.time()
-    window_start = now - RATE_LIMIT_WINDOW
-    calls = [t for t in _rate_store[ip] if t > window_start]
-    if len(calls) >= RATE_LIMIT_REQUESTS:
+    now          = time.monotonic()
+    tokens, last = _rate_store.get(ip, (float(RATE_LIMIT_REQUESTS), now))
+    tokens = min(
+        float(RATE_LIMIT_REQUESTS),
+        tokens + (now - last) * RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW,
+    )
+    if tokens < 1:
+        _rate_store[ip] = (tokens, now)
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded: max {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW}s.",
         )
-    calls.append(now)
-    _rate_store[ip] = calls
+    _rate_store[ip] = (tokens - 1, now)
 
 
 # ── Lifespan: warm-up on startup ──────────────────────────────────────────────
@@ -47,9 +58,13 @@ async def lifespan(app: FastAPI):
     logger.info("AKAR RAG backend starting — warming up …")
     # Pre-load OpenAI client + FAISS index into memory so first request is fast
     from app.services.rag import warmup
+    from app.services.index import close_openai_client, start_embed_batcher, stop_embed_batcher
     warmup(str(STORAGE_DIR))
+    start_embed_batcher()
     logger.info("Warm-up done. Ready to serve requests.")
     yield
+    await stop_embed_batcher()
+    await close_openai_client()
     logger.info("AKAR RAG backend shutting down.")
 
 
@@ -59,6 +74,7 @@ app = FastAPI(
     description="Production-grade RAG backend for the AKAR Strategic Consultants website chatbot.",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -71,11 +87,13 @@ app.add_middleware(
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
+    if request.url.path in RATE_LIMIT_EXEMPT:
+        return await call_next(request)
     client_ip = request.client.host if request.client else "unknown"
     try:
         _check_rate_limit(client_ip)
     except HTTPException as exc:
-        return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+        return ORJSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
     return await call_next(request)
 
 app.include_router(ingest.router, prefix="/api", tags=["Ingest"])
@@ -1,10 +1,13 @@
 import logging
+from collections.abc import AsyncIterator
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+import orjson
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 
-from app.services.rag import answer_question
+from app.services.rag import answer_question, answer_question_stream
 
 logger = logging.getLogger(__name__)
 
@@ -45,11 +48,25 @@ class ChatResponse(BaseModel):
 
 # ── Endpoint ──────────────────────────────────────────────────────────────────
 
+async def _sse_events(question: str) -> AsyncIterator[bytes]:
+    try:
+        async for event in answer_question_stream(question, str(STORAGE_DIR)):
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    except Exception as exc:
+        # Headers are already sent — report the failure in-band
+        logger.exception("RAG pipeline error (stream)")
+        yield b"data: " + orjson.dumps({"type": "error", "detail": f"RAG error: {exc}"}) + b"\n\n"
+
+
 @router.post("/chat", response_model=ChatResponse, summary="Ask the AKAR chatbot")
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, accept: str | None = Header(default=None)):
     """
     Retrieve relevant chunks from the AKAR website knowledge base and
     generate an answer using an LLM. Always includes source URLs.
+
+    Clients sending ``Accept: text/event-stream`` receive the answer as
+    Server-Sent Events (sources, then tokens, then confidence) instead of
+    a single JSON body.
     """
     index_file = STORAGE_DIR / "faiss.index"
     if not index_file.exists():
@@ -60,8 +77,15 @@ async def chat(request: ChatRequest):
 
     logger.info("Chat question: %r", request.question)
 
+    if accept and "text/event-stream" in accept:
+        return StreamingResponse(
+            _sse_events(request.question),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     try:
-        result = answer_question(request.question, str(STORAGE_DIR))
+        result = await answer_question(request.question, str(STORAGE_DIR))
     except Exception as exc:
         logger.exception("RAG pipeline error")
         raise HTTPException(status_code=500, detail=f"RAG error: {exc}") from exc
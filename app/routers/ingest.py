@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from pathlib import Path
 
@@ -6,6 +7,7 @@ from pydantic import BaseModel
 
 from app.services.pdf_parser import parse_pdf_sections
 from app.services.index import build_index
+from app.services.rag import clear_answer_cache, warm_token_costs
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +39,8 @@ async def ingest():
     logger.info("Ingest started — reading %s", PDF_PATH)
 
     try:
-        sections = parse_pdf_sections(str(PDF_PATH))
+        # Off the event loop — parsing is CPU-bound and would stall /chat for its duration
+        sections = await asyncio.to_thread(parse_pdf_sections, str(PDF_PATH))
     except Exception as exc:
         logger.exception("PDF parsing failed")
         raise HTTPException(status_code=500, detail=f"PDF parsing error: {exc}") from exc
@@ -48,10 +51,15 @@ async def ingest():
     logger.info("Parsed %d sections", len(sections))
 
     try:
-        chunk_count = build_index(sections, str(STORAGE_DIR))
+        chunk_count = await build_index(sections, str(STORAGE_DIR))
     except Exception as exc:
         logger.exception("Index build failed")
         raise HTTPException(status_code=500, detail=f"Indexing error: {exc}") from exc
 
+    # Cached answers were generated against the old index
+    clear_answer_cache()
+    # Ingest just loaded the tokenizer; make sure layout costs are exact from now on
+    warm_token_costs()
+
     logger.info("Ingest complete — %d chunks indexed", chunk_count)
     return IngestResponse(status="success", sections=len(sections), chunks=chunk_count)
@@ -5,15 +5,21 @@ Chunks sections, embeds them with OpenAI, stores in a local FAISS index,
 and persists both the index and metadata to disk.
 """
 
+import asyncio
+import functools
+import json
 import logging
 import os
-import pickle
 from pathlib import Path
 from typing import Any
 
 import faiss
+import httpx
 import numpy as np
-from openai import OpenAI
+import pyarrow as pa
+import pyarrow.parquet as pq
+import tiktoken
+from openai import AsyncOpenAI
 
 from app.services.pdf_parser import Section
 
@@ -21,47 +27,136 @@ logger = logging.getLogger(__name__)
 
 # ── Configuration ─────────────────────────────────────────────────────────────
 EMBEDDING_MODEL  = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMS   = int(os.getenv("EMBEDDING_DIMS", "512"))  # Matryoshka truncation; 0 = model default
 CHUNK_SIZE       = int(os.getenv("CHUNK_SIZE", "600"))    # smaller = more chunks = better recall
 CHUNK_OVERLAP    = int(os.getenv("CHUNK_OVERLAP", "100"))
+SNIPPET_LENGTH   = 200                                    # source preview shown in chat responses
+TOKENIZER_MODEL  = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")  # chunk tokens are counted for the reader
 DOC_ID           = "akar_website_pdf_v1"
 FAISS_INDEX_FILE = "faiss.index"
-METADATA_FILE    = "metadata.pkl"
+METADATA_FILE    = "metadata.parquet"
+SECTIONS_FILE    = "sections.parquet"
+INDEX_INFO_FILE  = "index_info.json"
+VECTORS_FILE     = "vectors.npy"
+
+# "auto"   → "flat" below max(IVF_MIN_VECTORS, NUMPY_SEARCH_MAX) chunks, "ivfpq" at or above it
+# "flat"   → IndexFlatIP, exact brute-force inner product
+# "ivfpq"  → IndexIVFPQ, inverted lists + product-quantised codes (large corpora),
+#            top candidates rescored in fp32
+# "hnsw"   → IndexHNSWFlat, sublinear graph search over fp32 vectors
+# "binary" → IndexBinaryFlat over sign bits (32× smaller), top candidates rescored in fp32
+INDEX_TYPE           = os.getenv("FAISS_INDEX_TYPE", "auto").lower()
+HNSW_M               = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH       = int(os.getenv("HNSW_EF_SEARCH", "64"))
+BINARY_RESCORE_K     = int(os.getenv("BINARY_RESCORE_K", "50"))
+IVFPQ_RESCORE_K      = int(os.getenv("IVFPQ_RESCORE_K", "50"))
+IVF_MIN_VECTORS      = int(os.getenv("IVF_MIN_VECTORS", "2000"))
+IVF_NPROBE           = int(os.getenv("IVF_NPROBE", "8"))
+PQ_M                 = int(os.getenv("PQ_M", "32"))
+PQ_NBITS             = 8
+# Below this many vectors a single numpy matmul over vectors.npy beats a flat FAISS index
+NUMPY_SEARCH_MAX     = int(os.getenv("NUMPY_SEARCH_MAX", "5000"))
+
+# Shared HTTP pool for all OpenAI calls — httpx's default limits bottleneck under load
+HTTP_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+HTTP_MAX_KEEPALIVE   = int(os.getenv("OPENAI_MAX_KEEPALIVE", "100"))
+
+# Query-embedding micro-batcher: concurrent /chat queries share one embeddings call
+EMBED_BATCH_WINDOW     = float(os.getenv("EMBED_BATCH_WINDOW_MS", "8")) / 1000
+EMBED_MAX_BATCH        = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_BATCH_TOKENS = int(os.getenv("EMBED_MAX_BATCH_TOKENS", "8000"))
 
 # ── Module-level singletons ───────────────────────────────────────────────────
-_openai_client:  OpenAI | None      = None
+_openai_client:  AsyncOpenAI | None = None
 _faiss_index:    faiss.Index | None = None
-_metadata_cache: list[dict] | None  = None
+_metadata_cache: "MetadataTable | None" = None
+_vectors_cache:  np.ndarray | None  = None   # memory-mapped vectors.npy (flat indexes only)
+_embed_queue:    asyncio.Queue | None = None
+_embed_worker:   asyncio.Task | None  = None
+_embed_inflight: set[asyncio.Task]    = set()
 
 
-def get_openai_client() -> OpenAI:
+def get_openai_client() -> AsyncOpenAI:
     global _openai_client
     if _openai_client is None:
-        _openai_client = OpenAI()
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            ),
+        )
+        _openai_client = AsyncOpenAI(http_client=http_client)
         logger.info("OpenAI client initialised (cached for process lifetime)")
     return _openai_client
 
 
-def get_cached_index(storage_dir: str) -> tuple[faiss.Index, list[dict]]:
-    global _faiss_index, _metadata_cache
+async def close_openai_client() -> None:
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+        logger.info("OpenAI client closed")
+
+
+@functools.lru_cache(maxsize=1)
+def get_token_encoding() -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def get_cached_index(storage_dir: str) -> tuple[faiss.Index, "MetadataTable"]:
+    global _faiss_index, _metadata_cache, _vectors_cache
     if _faiss_index is None or _metadata_cache is None:
         _faiss_index, _metadata_cache = _load_index_from_disk(storage_dir)
+        # Only flat indexes take the numpy path; an explicit hnsw/ivfpq/binary choice is honoured
+        vectors_path   = Path(storage_dir) / VECTORS_FILE
+        use_numpy      = isinstance(_faiss_index, faiss.IndexFlat) and vectors_path.exists()
+        _vectors_cache = np.load(vectors_path, mmap_mode="r") if use_numpy else None
         logger.info("FAISS index loaded into memory (%d vectors)", _faiss_index.ntotal)
     return _faiss_index, _metadata_cache
 
 
 def invalidate_index_cache() -> None:
-    global _faiss_index, _metadata_cache
+    global _faiss_index, _metadata_cache, _vectors_cache
     _faiss_index    = None
     _metadata_cache = None
+    _vectors_cache  = None
     logger.info("FAISS index cache invalidated — will reload on next query")
 
 
 # ── Chunking ──────────────────────────────────────────────────────────────────
 
+def _char_positions(text: str, char: str) -> np.ndarray:
+    """Sorted character offsets of every occurrence of *char* in *text*."""
+    if text.isascii():
+        codes = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    else:
+        # UTF-32 keeps one code unit per character so offsets stay char-aligned
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return np.flatnonzero(codes == ord(char))
+
+
+def _last_before(positions: np.ndarray, lo: int, hi: int) -> int:
+    """Largest position p with lo <= p < hi, or -1 (same contract as str.rfind)."""
+    i = int(np.searchsorted(positions, hi, side="left")) - 1
+    if i >= 0 and positions[i] >= lo:
+        return int(positions[i])
+    return -1
+
+
 def _chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
     if not text:
         return []
 
+    # Boundary candidates are located once per section; each window then
+    # snaps with a binary search instead of rescanning the text.
+    newlines = _char_positions(text, "\n")
+    spaces   = _char_positions(text, " ")
+
     chunks: list[str] = []
     start    = 0
     text_len = len(text)
@@ -71,10 +166,10 @@ def _chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OV
 
         if end < text_len:
             # Try to break at newline first (better semantic boundaries)
-            snap = text.rfind("\n", start + overlap, end)
+            snap = _last_before(newlines, start + overlap, end)
             if snap <= start:
                 # Fall back to whitespace
-                snap = text.rfind(" ", start + overlap, end)
+                snap = _last_before(spaces, start + overlap, end)
             if snap > start:
                 end = snap
 
@@ -92,35 +187,303 @@ def _chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OV
 
 # ── Embedding ─────────────────────────────────────────────────────────────────
 
-def _embed_texts(texts: list[str], client: OpenAI) -> np.ndarray:
-    response = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+async def _embed_texts(texts: list[str], client: AsyncOpenAI) -> np.ndarray:
+    # Truncated embeddings are no longer unit-norm — callers must normalize_L2
+    kwargs: dict[str, Any] = {"dimensions": EMBEDDING_DIMS} if EMBEDDING_DIMS else {}
+    response = await client.embeddings.create(model=EMBEDDING_MODEL, input=texts, **kwargs)
     vectors  = [item.embedding for item in response.data]
     return np.array(vectors, dtype=np.float32)
 
 
+def _approx_tokens(text: str) -> int:
+    # ~4 chars per token for English text — only used to cap batch size
+    return len(text) // 4 + 1
+
+
+async def _run_embed_batch(batch: list[tuple[str, asyncio.Future]]) -> None:
+    try:
+        vectors = await _embed_texts([text for text, _ in batch], get_openai_client())
+        faiss.normalize_L2(vectors)
+    except Exception as exc:
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_exception(exc)
+        return
+    for i, (_, fut) in enumerate(batch):
+        if not fut.done():          # caller may have been cancelled meanwhile
+            fut.set_result(vectors[i : i + 1])
+
+
+async def _embed_batch_loop(queue: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    carry: tuple[str, asyncio.Future] | None = None
+
+    while True:
+        first  = carry or await queue.get()
+        carry  = None
+        batch  = [first]
+        tokens = _approx_tokens(first[0])
+        deadline = loop.time() + EMBED_BATCH_WINDOW
+
+        while len(batch) < EMBED_MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            item_tokens = _approx_tokens(item[0])
+            if tokens + item_tokens > EMBED_MAX_BATCH_TOKENS:
+                carry = item
+                break
+            batch.append(item)
+            tokens += item_tokens
+
+        if len(batch) > 1:
+            logger.debug("Embedding %d coalesced queries (~%d tokens)", len(batch), tokens)
+        # Fire the API call without blocking collection of the next batch
+        task = asyncio.create_task(_run_embed_batch(batch))
+        _embed_inflight.add(task)
+        task.add_done_callback(_embed_inflight.discard)
+
+
+def start_embed_batcher() -> None:
+    global _embed_queue, _embed_worker
+    if _embed_worker is not None and not _embed_worker.done():
+        return
+    _embed_queue  = asyncio.Queue()
+    _embed_worker = asyncio.create_task(_embed_batch_loop(_embed_queue))
+    logger.info("Embedding batcher started (window=%.0fms, max_batch=%d)",
+                EMBED_BATCH_WINDOW * 1000, EMBED_MAX_BATCH)
+
+
+async def stop_embed_batcher() -> None:
+    global _embed_queue, _embed_worker
+    if _embed_worker is None:
+        return
+    _embed_worker.cancel()
+    try:
+        await _embed_worker
+    except asyncio.CancelledError:
+        pass
+    _embed_queue  = None
+    _embed_worker = None
+    logger.info("Embedding batcher stopped")
+
+
+async def embed_query(query: str) -> np.ndarray:
+    """Embed a single query and L2-normalise it — shape (1, dim)."""
+    start_embed_batcher()   # no-op once running; covers use outside the app lifespan
+    fut = asyncio.get_running_loop().create_future()
+    await _embed_queue.put((query, fut))
+    return await fut
+
+
+# ── Index types ───────────────────────────────────────────────────────────────
+
+class _RescoredIndex:
+    """
+    Approximate candidate search followed by exact inner-product rescoring of
+    the top *n_candidates* against the fp32 vectors, so scores stay true
+    cosines. Wraps the binary index (Hamming over packed sign bits) and
+    IVFPQ (PQ-approximated inner products). Exposes the same ntotal /
+    search() surface as a faiss.Index so callers don't care which one they hold.
+    """
+
+    def __init__(self, index: Any, vectors: np.ndarray, n_candidates: int, binary: bool = False):
+        self.index        = index
+        self.vectors      = vectors
+        self.n_candidates = n_candidates
+        self.binary       = binary
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def search(self, q_vec: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+        n_candidates = min(max(top_k, self.n_candidates), self.ntotal)
+        query = np.packbits(q_vec > 0, axis=1) if self.binary else q_vec
+        _, candidates = self.index.search(query, n_candidates)
+        candidates = candidates[0][candidates[0] != -1]
+
+        rescored = self.vectors[candidates] @ q_vec[0]
+        order    = np.argsort(-rescored)[:top_k]
+
+        scores  = np.full((1, top_k), -np.inf, dtype=np.float32)
+        indices = np.full((1, top_k), -1, dtype=np.int64)
+        scores[0, : len(order)]  = rescored[order]
+        indices[0, : len(order)] = candidates[order]
+        return scores, indices
+
+
+def _build_ivfpq(vectors: np.ndarray) -> faiss.IndexIVFPQ:
+    total, dim = vectors.shape
+    nlist = max(4, int(np.sqrt(total)))
+    m     = PQ_M
+    while dim % m:          # PQ needs dim divisible by the number of sub-quantisers
+        m -= 1
+    quantizer = faiss.IndexFlatIP(dim)
+    index = faiss.IndexIVFPQ(quantizer, dim, nlist, m, PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+    index.train(vectors)
+    index.add(vectors)
+    index.nprobe = IVF_NPROBE
+    logger.info("Trained IVFPQ — nlist=%d, m=%d, nprobe=%d", nlist, m, IVF_NPROBE)
+    return index
+
+
+def _resolve_index_type(total: int, dim: int) -> str:
+    """Resolve FAISS_INDEX_TYPE for this corpus, falling back to flat where faiss would fail."""
+    index_type = INDEX_TYPE
+    if index_type == "auto":
+        # Stay flat while the numpy path would serve it anyway — no point training IVFPQ
+        return "ivfpq" if total >= max(IVF_MIN_VECTORS, NUMPY_SEARCH_MAX) else "flat"
+
+    if index_type == "ivfpq" and total < 2 ** PQ_NBITS:
+        # PQ k-means needs at least one training vector per centroid
+        logger.warning(
+            "FAISS_INDEX_TYPE=ivfpq needs at least %d vectors to train, got %d — using flat",
+            2 ** PQ_NBITS, total,
+        )
+        return "flat"
+    if index_type == "binary" and dim % 8:
+        logger.warning(
+            "FAISS_INDEX_TYPE=binary needs a dimension divisible by 8, got %d — using flat", dim,
+        )
+        return "flat"
+    return index_type
+
+
+def _write_index(vectors: np.ndarray, storage_path: Path) -> tuple[str, int]:
+    """Build the configured index type over *vectors* and persist it; returns (type, ntotal)."""
+    total, dim = vectors.shape
+    info: dict[str, Any] = {"dim": dim}
+
+    index_type = _resolve_index_type(total, dim)
+
+    if index_type == "binary":
+        bin_index = faiss.IndexBinaryFlat(dim)
+        bin_index.add(np.packbits(vectors > 0, axis=1))
+        faiss.write_index_binary(bin_index, str(storage_path / FAISS_INDEX_FILE))
+        ntotal = bin_index.ntotal
+    else:
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            index.add(vectors)
+        elif index_type == "ivfpq":
+            index = _build_ivfpq(vectors)
+            info["nprobe"] = index.nprobe
+        else:
+            index_type = "flat"
+            index = faiss.IndexFlatIP(dim)
+            index.add(vectors)
+        faiss.write_index(index, str(storage_path / FAISS_INDEX_FILE))
+        ntotal = index.ntotal
+
+    # fp32 copy for binary rescoring and the small-corpus numpy search path
+    np.save(storage_path / VECTORS_FILE, vectors)
+
+    info["index_type"] = index_type
+    with open(storage_path / INDEX_INFO_FILE, "w") as f:
+        json.dump(info, f)
+    return index_type, ntotal
+
+
+# ── Metadata store ────────────────────────────────────────────────────────────
+
+class MetadataTable:
+    """
+    Struct-of-arrays chunk metadata. Per-chunk columns hold only an int32
+    section_id, the chunk index, its token count, the (memory-mapped) text
+    and its precomputed source snippet; each section's url and title are
+    stored once. Indexing returns one chunk as a dict, decoding
+    only the rows a query actually touches.
+    """
+
+    def __init__(self, chunks: pa.Table, sections: pa.Table):
+        self.section_ids  = chunks.column("section_id").to_numpy()
+        self.chunk_index  = chunks.column("chunk_index").to_numpy()
+        self.n_tokens     = chunks.column("n_tokens").to_numpy()
+        self.texts        = chunks.column("text")
+        self.snippets     = chunks.column("snippet")
+        self.urls         = sections.column("url").to_pylist()
+        self.titles       = sections.column("section_title").to_pylist()
+        self.title_tokens = sections.column("title_tokens").to_pylist()
+        self.url_tokens   = sections.column("url_tokens").to_pylist()
+
+    def __len__(self) -> int:
+        return len(self.section_ids)
+
+    def __getitem__(self, idx: int) -> dict[str, Any]:
+        sid = self.section_ids[idx]
+        return {
+            "url":           self.urls[sid],
+            "section_title": self.titles[sid],
+            "title_tokens":  self.title_tokens[sid],
+            "url_tokens":    self.url_tokens[sid],
+            "chunk_index":   int(self.chunk_index[idx]),
+            "n_tokens":      int(self.n_tokens[idx]),
+            "doc_id":        DOC_ID,
+            "text":          self.texts[int(idx)].as_py(),
+            "snippet":       self.snippets[int(idx)].as_py(),
+        }
+
+
+def _snippet(text: str) -> str:
+    snippet = text[:SNIPPET_LENGTH].strip()
+    if len(text) > SNIPPET_LENGTH:
+        snippet += " …"
+    return snippet
+
+
+def _write_metadata(
+    sections: list[Section],
+    section_ids: list[int],
+    chunk_indices: list[int],
+    texts: list[str],
+    storage_path: Path,
+) -> None:
+    enc      = get_token_encoding()
+    n_tokens = [len(tokens) for tokens in enc.encode_ordinary_batch(texts)]
+    chunks_table = pa.table({
+        "section_id":  pa.array(section_ids, type=pa.int32()),
+        "chunk_index": pa.array(chunk_indices, type=pa.int32()),
+        "n_tokens":    pa.array(n_tokens, type=pa.int32()),
+        "text":        pa.array(texts, type=pa.string()),
+        "snippet":     pa.array([_snippet(text) for text in texts], type=pa.string()),
+    })
+    urls   = [section.url for section in sections]
+    titles = [section.section_title for section in sections]
+    sections_table = pa.table({
+        "url":           urls,
+        "section_title": titles,
+        # Raw field token counts so the query path can budget context without a tokenizer
+        "url_tokens":    pa.array([len(t) for t in enc.encode_ordinary_batch(urls)], type=pa.int32()),
+        "title_tokens":  pa.array([len(t) for t in enc.encode_ordinary_batch(titles)], type=pa.int32()),
+    })
+    pq.write_table(chunks_table, str(storage_path / METADATA_FILE), compression="zstd")
+    pq.write_table(sections_table, str(storage_path / SECTIONS_FILE), compression="zstd")
+
+
 # ── Build / persist index ─────────────────────────────────────────────────────
 
-def build_index(sections: list[Section], storage_dir: str) -> int:
+async def build_index(sections: list[Section], storage_dir: str) -> int:
     client = get_openai_client()
 
     storage_path = Path(storage_dir)
     storage_path.mkdir(parents=True, exist_ok=True)
 
-    all_chunks:   list[str]            = []
-    all_metadata: list[dict[str, Any]] = []
+    all_chunks:    list[str] = []
+    section_ids:   list[int] = []
+    chunk_indices: list[int] = []
 
-    for section in sections:
+    for section_id, section in enumerate(sections):
         chunks = _chunk_text(section.full_text)
         logger.info("Section '%s' → %d chunks", section.section_title, len(chunks))
-        for idx, chunk in enumerate(chunks):
-            all_chunks.append(chunk)
-            all_metadata.append({
-                "url":           section.url,
-                "section_title": section.section_title,
-                "chunk_index":   idx,
-                "doc_id":        DOC_ID,
-                "text":          chunk,
-            })
+        all_chunks.extend(chunks)
+        section_ids.extend([section_id] * len(chunks))
+        chunk_indices.extend(range(len(chunks)))
 
     total = len(all_chunks)
     logger.info("Total chunks to embed: %d", total)
@@ -133,45 +496,84 @@ def build_index(sections: list[Section], storage_dir: str) -> int:
     for batch_start in range(0, total, BATCH_SIZE):
         batch = all_chunks[batch_start : batch_start + BATCH_SIZE]
         logger.info("Embedding batch %d–%d of %d …", batch_start + 1, min(batch_start + BATCH_SIZE, total), total)
-        all_vectors.append(_embed_texts(batch, client))
+        all_vectors.append(await _embed_texts(batch, client))
 
     vectors = np.vstack(all_vectors).astype(np.float32)
     faiss.normalize_L2(vectors)
 
-    dim   = vectors.shape[1]
-    index = faiss.IndexFlatIP(dim)
-    index.add(vectors)
+    dim                = vectors.shape[1]
+    index_type, ntotal = _write_index(vectors, storage_path)
 
-    faiss.write_index(index, str(storage_path / FAISS_INDEX_FILE))
-    with open(storage_path / METADATA_FILE, "wb") as f:
-        pickle.dump(all_metadata, f)
+    _write_metadata(sections, section_ids, chunk_indices, all_chunks, storage_path)
 
     invalidate_index_cache()
 
-    logger.info("FAISS index saved — dim=%d, vectors=%d", dim, index.ntotal)
+    logger.info("FAISS index saved — type=%s, dim=%d, vectors=%d", index_type, dim, ntotal)
     return total
 
 
 # ── Load index from disk ──────────────────────────────────────────────────────
 
-def _load_index_from_disk(storage_dir: str) -> tuple[faiss.Index, list[dict]]:
+def _load_index_from_disk(storage_dir: str) -> tuple[faiss.Index, MetadataTable]:
     storage_path = Path(storage_dir)
-    index = faiss.read_index(str(storage_path / FAISS_INDEX_FILE))
-    with open(storage_path / METADATA_FILE, "rb") as f:
-        metadata = pickle.load(f)
+
+    info_path = storage_path / INDEX_INFO_FILE
+    info = json.loads(info_path.read_text()) if info_path.exists() else {}
+    if EMBEDDING_DIMS and info.get("dim", EMBEDDING_DIMS) != EMBEDDING_DIMS:
+        raise ValueError(
+            f"Index was built with dim={info['dim']} but EMBEDDING_DIMS={EMBEDDING_DIMS} — "
+            "re-run ingest."
+        )
+
+    if info.get("index_type") == "binary":
+        bin_index = faiss.read_index_binary(str(storage_path / FAISS_INDEX_FILE))
+        vectors   = np.load(storage_path / VECTORS_FILE, mmap_mode="r")
+        index     = _RescoredIndex(bin_index, vectors, BINARY_RESCORE_K, binary=True)
+    else:
+        index = faiss.read_index(str(storage_path / FAISS_INDEX_FILE))
+        if isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        elif isinstance(index, faiss.IndexIVF):
+            index.nprobe = info.get("nprobe", IVF_NPROBE)
+            # PQ inner products are approximate — rescore so confidence thresholds see true cosines
+            vectors = np.load(storage_path / VECTORS_FILE, mmap_mode="r")
+            index   = _RescoredIndex(index, vectors, IVFPQ_RESCORE_K)
+
+    metadata = MetadataTable(
+        pq.read_table(storage_path / METADATA_FILE, memory_map=True),
+        pq.read_table(storage_path / SECTIONS_FILE),
+    )
     return index, metadata
 
 
 # ── Similarity search ─────────────────────────────────────────────────────────
 
-def similarity_search(query: str, storage_dir: str, top_k: int = 6) -> list[tuple[dict, float]]:
-    client          = get_openai_client()
+def _numpy_search(vectors: np.ndarray, q_vec: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Exact inner-product top-k with one BLAS matvec; same (scores, indices) shape as faiss."""
+    scores = vectors @ q_vec[0]
+    k      = min(top_k, len(scores))
+    top    = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(k)
+    top    = top[np.argsort(-scores[top])]
+    return scores[top][None, :], top[None, :]
+
+
+async def similarity_search(
+    query: str,
+    storage_dir: str,
+    top_k: int = 6,
+    q_vec: np.ndarray | None = None,
+) -> list[tuple[dict, float]]:
     index, metadata = get_cached_index(storage_dir)
 
-    q_vec = _embed_texts([query], client)
-    faiss.normalize_L2(q_vec)
+    # Callers that already embedded the query (e.g. the answer cache) pass it in
+    if q_vec is None:
+        q_vec = await embed_query(query)
 
-    scores, indices = index.search(q_vec, top_k)
+    vectors = _vectors_cache
+    if vectors is not None and len(vectors) == index.ntotal and index.ntotal < NUMPY_SEARCH_MAX:
+        scores, indices = _numpy_search(vectors, q_vec, top_k)
+    else:
+        scores, indices = index.search(q_vec, top_k)
 
     return [
         (metadata[idx], float(score))
@@ -16,23 +16,50 @@ is treated as a new section header.
 All subsequent lines belong to that section until the next header appears.
 """
 
-import re
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from typing import Optional
 
 import fitz  # PyMuPDF
 
+try:
+    import re2 as re  # DFA engine — linear-time matching, no backtracking
+except ImportError:  # no google-re2 wheel for this platform — stdlib fallback
+    import re
+
 logger = logging.getLogger(__name__)
 
+# Serial extraction runs ~1.3 ms/page and a spawned worker costs ~0.2 s to start,
+# so a pool only wins on large documents
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "500"))
+PDF_WORKERS        = int(os.getenv("PDF_WORKERS", "0")) or None   # None → os.cpu_count()
+
 # Matches:  Any text  ( http://... )  or  ( https://... )
+# Case-insensitivity is inline because re2 does not accept re-style flags.
 _SECTION_HEADER_RE = re.compile(
-    r"^(?P<title>.+?)\s*\(\s*(?P<url>https?://[^\s)]+)\s*\)\s*$",
-    re.IGNORECASE,
+    r"(?i)^(?P<title>.+?)\s*\(\s*(?P<url>https?://[^\s)]+)\s*\)\s*$",
 )
 
+# re2's \s is ASCII-only ([\t\n\f\r ]); PDF text often carries NBSP, U+2009, U+202F
+# etc. in headers. Fold every other str.isspace() character to a plain space so
+# re2 and the stdlib fallback match the same lines. (No whitespace exists above U+3000.)
+_SPACE_FOLD = str.maketrans({
+    c: " " for c in range(0x3001) if chr(c).isspace() and chr(c) not in " \t\n\f\r"
+})
+
+
+def _match_header(line: str):
+    """Return the header match for a stripped line, or None for body text."""
+    # Every header carries a URL — skip the regex for ordinary body lines
+    if "://" not in line:
+        return None
+    return _SECTION_HEADER_RE.match(line.translate(_SPACE_FOLD))
 
-@dataclass
+
+@dataclass(slots=True)
 class Section:
     section_title: str
     url: str
@@ -44,6 +71,42 @@ class Section:
         self.full_text = "\n".join(self.lines).strip()
 
 
+def _page_lines(page: fitz.Page) -> list[str]:
+    # Block tuples are (x0, y0, x1, y1, text, block_no, block_type); type 1 = image.
+    # A header can share a block with body text, so blocks are still split into
+    # lines for the (anchored) header regex.
+    return [
+        line
+        for block in page.get_text("blocks")
+        if block[6] == 0
+        for line in block[4].splitlines()
+    ]
+
+
+def _extract_page_range(args: tuple[str, int, int]) -> list[list[str]]:
+    """Process-pool worker: open the PDF once and return the lines of pages [start, stop)."""
+    pdf_path, start, stop = args
+    with fitz.open(pdf_path) as doc:
+        return [_page_lines(doc[i]) for i in range(start, stop)]
+
+
+def _extract_all_pages(doc: fitz.Document, pdf_path: str) -> list[list[str]]:
+    """Return the lines of every page, in page order."""
+    page_count = len(doc)
+    workers    = min(PDF_WORKERS or os.cpu_count() or 1, page_count)
+    if page_count < PARALLEL_MIN_PAGES or workers < 2:
+        return [_page_lines(page) for page in doc]
+
+    # One contiguous range per worker — each process pays the spawn + open cost once
+    bounds = [page_count * w // workers for w in range(workers + 1)]
+    ranges = [(pdf_path, start, stop) for start, stop in zip(bounds, bounds[1:])]
+
+    # spawn, not fork — forking a process that runs an event loop and HTTP pools is unsafe
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return [lines for chunk in pool.map(_extract_page_range, ranges) for lines in chunk]
+
+
 def parse_pdf_sections(pdf_path: str) -> list[Section]:
     """
     Parse *pdf_path* and return a list of Section objects, each containing:
@@ -57,16 +120,14 @@ def parse_pdf_sections(pdf_path: str) -> list[Section]:
     sections: list[Section] = []
     current: Optional[Section] = None
 
-    for page_num, page in enumerate(doc, start=1):
-        raw_text = page.get_text("text")
-        lines = raw_text.splitlines()
-
+    # Text extraction runs in parallel; section stitching below stays serial
+    for page_num, lines in enumerate(_extract_all_pages(doc, pdf_path), start=1):
         for line in lines:
             stripped = line.strip()
             if not stripped:
                 continue
 
-            match = _SECTION_HEADER_RE.match(stripped)
+            match = _match_header(stripped)
             if match:
                 # Finalise previous section
                 if current is not None:
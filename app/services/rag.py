@@ -4,13 +4,19 @@ rag.py
 Retrieve relevant chunks → build prompt → call OpenAI chat → return structured answer.
 """
 
+import functools
+import hashlib
 import logging
 import os
+import re
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
 from typing import Any
 
-from openai import OpenAI
+import numpy as np
 
-from app.services.index import get_openai_client, similarity_search
+from app.services.index import embed_query, get_openai_client, get_token_encoding, similarity_search
 
 logger = logging.getLogger(__name__)
 
@@ -18,16 +24,24 @@ logger = logging.getLogger(__name__)
 CHAT_MODEL       = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
 TOP_K            = int(os.getenv("TOP_K", "6"))
 MAX_SOURCES      = 3
-SNIPPET_LENGTH   = 200
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
 
 HIGH_THRESHOLD   = float(os.getenv("CONFIDENCE_HIGH_THRESHOLD",   "0.70"))
 MEDIUM_THRESHOLD = float(os.getenv("CONFIDENCE_MEDIUM_THRESHOLD", "0.45"))
 
+ANSWER_CACHE_SIZE        = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL         = float(os.getenv("ANSWER_CACHE_TTL", "3600"))    # seconds
+SEMANTIC_CACHE_SIZE      = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+
 NOT_FOUND_PHRASE = "I couldn't find this information in the website knowledge base."
 
-SYSTEM_PROMPT_TEMPLATE = """You are the official AI assistant for AKAR Strategic Consultants website.
+# Kept byte-identical across requests (no per-request formatting) and above
+# OpenAI's 1024-token prompt-cache threshold, so the whole system message is
+# served from the prefix cache. Per-request CONTEXT goes in a later message.
+SYSTEM_PROMPT = """You are the official AI assistant for AKAR Strategic Consultants website.
 
-Your job is to answer visitor questions using ONLY the context provided below.
+Your job is to answer visitor questions using ONLY the context provided in the CONTEXT message of this conversation.
 
 STRICT RULES:
 1. Read ALL context chunks carefully before answering.
@@ -42,20 +56,194 @@ STRICT RULES:
 6. Never fabricate URLs — only use URLs that appear in the context.
 7. Do not mention "context", "chunks", or "documents" in your answer.
 
-CONTEXT:
-{context}
-"""
+REFERENCE: CONTEXT MESSAGE FORMAT
+The remainder of this message describes how the CONTEXT message is laid out. It is a fixed
+reference and does not change between conversations.
+
+- Each conversation consists of this system message, then the CONTEXT message, then the
+  visitor's question as the final message, trimmed of surrounding whitespace.
+- Each question is answered on its own. Earlier questions and answers from the same visitor
+  are not part of the conversation.
+- The CONTEXT message begins with the line "CONTEXT:" followed by one or more entries.
+- Consecutive entries are separated by a line containing only three hyphens ("---"), with a
+  blank line before and after it.
+- Every entry starts with a single header line of the form:
+      [N] Section: <SECTION TITLE> | URL: <PAGE URL>
+  where N is the position of the entry in the list, starting at 1.
+- The line after the header begins the excerpt body. The body continues until the next
+  separator or the end of the message.
+- <SECTION TITLE> is the heading of a section of the AKAR website as it appears in the
+  consolidated website document, usually written in capital letters, for example
+  "HERO PAGE", "SOLUTIONS", or "ABOUT US".
+- <PAGE URL> is the address of the website page on which that section appears. Several
+  different sections can share the same page URL when they are parts of one long page.
+- Excerpt bodies are plain text extracted from a PDF export of the website. Visual layout
+  such as columns, cards, buttons, and images is not preserved; only the text remains.
+- Line breaks inside an excerpt body generally follow the line breaks of the exported PDF,
+  not sentence or paragraph boundaries. A single sentence may therefore span several lines,
+  and a single line may hold a heading, a button label, or a list item.
+- Headings, navigation labels, and call-to-action labels from the website can appear inside
+  an excerpt body as short lines without punctuation.
+- Excerpts are consecutive windows over a section's text. Neighbouring windows overlap
+  slightly, so the same sentence can occur at the end of one entry and the start of another.
+- An excerpt can begin or end in the middle of a sentence because of this windowing.
+- Entries are listed in order of decreasing similarity to the visitor's question, so entry
+  [1] is the closest match. The number of entries varies from one question to the next.
+- More than one entry can come from the same section; in that case their header lines carry
+  identical section titles and URLs.
+- The total length of the CONTEXT message is capped, so lower-ranked entries are sometimes
+  left out. The entries that are present always include entry [1].
+- Section titles and page URLs in header lines are copied verbatim from the website
+  document; they are not shortened, translated, or rewritten.
+- Page URLs are absolute addresses beginning with "http://" or "https://", exactly as they
+  were printed next to the section heading in the website document.
+- Header lines appear only at the start of entries. An excerpt body never contains a header
+  line of its own.
+- Entry numbers are assigned afresh for every conversation and carry no meaning beyond the
+  ranking order described above.
+- The ranking is computed from text similarity alone. It does not reflect how important,
+  prominent, or recent a section is on the website.
+- An excerpt body is taken from the section's text only; the section title is not repeated
+  at the start of the body.
+- Excerpt bodies are not summarised, paraphrased, or corrected. Spelling, capitalisation,
+  and punctuation follow the website document.
+- Characters from the PDF export are kept as they are. Bullet glyphs such as "•", dashes,
+  curly quotes, ellipses, and accented letters can all appear in excerpt bodies.
+- Whitespace at the start and end of each excerpt body has been removed. Blank lines inside
+  an excerpt body have been removed as well.
+
+Illustrative layout with placeholder text (not real website content):
+
+    CONTEXT:
+    [1] Section: <SECTION TITLE A> | URL: <PAGE URL A>
+    <excerpt text, first line>
+    <excerpt text, second line>
+
+    ---
+
+    [2] Section: <SECTION TITLE B> | URL: <PAGE URL B>
+    <excerpt text>
+
+    ---
+
+    [3] Section: <SECTION TITLE A> | URL: <PAGE URL A>
+    <excerpt text that continues the section of entry [1]>
+""".format(not_found=NOT_FOUND_PHRASE)
+
+CONTEXT_MESSAGE_PREFIX = "CONTEXT:\n"
+
+
+# ── Answer cache ──────────────────────────────────────────────────────────────
+# Tier 1: exact match on the SHA-256 of the normalised question (skips embed + chat).
+# Tier 2: cosine match of the query vector against a ring buffer of recent
+#         query vectors (skips chat only — paraphrases of a cached question).
+_answer_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_query_vecs:   np.ndarray | None                = None   # (SEMANTIC_CACHE_SIZE, dim), L2-normalised
+_query_keys:   list[str | None]                 = [None] * SEMANTIC_CACHE_SIZE
+_query_pos:    int                              = 0
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _cache_key(question: str) -> str:
+    normalised = _WHITESPACE_RE.sub(" ", question.lower().strip())
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: str) -> dict[str, Any] | None:
+    entry = _answer_cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry["ts"] > ANSWER_CACHE_TTL:
+        del _answer_cache[key]
+        return None
+    _answer_cache.move_to_end(key)
+    return entry["result"]
+
+
+def _cache_put(key: str, result: dict[str, Any], q_vec: np.ndarray) -> None:
+    global _query_vecs, _query_pos
+    _answer_cache[key] = {"result": result, "ts": time.monotonic()}
+    _answer_cache.move_to_end(key)
+    while len(_answer_cache) > ANSWER_CACHE_SIZE:
+        _answer_cache.popitem(last=False)
+
+    if SEMANTIC_CACHE_SIZE <= 0:
+        return
+    if _query_vecs is None or _query_vecs.shape[1] != q_vec.shape[1]:
+        _query_vecs = np.zeros((SEMANTIC_CACHE_SIZE, q_vec.shape[1]), dtype=np.float32)
+        _query_keys[:] = [None] * SEMANTIC_CACHE_SIZE
+        _query_pos = 0
+    _query_vecs[_query_pos] = q_vec[0]
+    _query_keys[_query_pos] = key
+    _query_pos = (_query_pos + 1) % SEMANTIC_CACHE_SIZE
+
+
+def _semantic_cache_get(q_vec: np.ndarray) -> dict[str, Any] | None:
+    if _query_vecs is None or _query_vecs.shape[1] != q_vec.shape[1]:
+        return None
+    sims = _query_vecs @ q_vec[0]          # unused slots are zero vectors → score 0
+    best = int(np.argmax(sims))
+    if sims[best] < SEMANTIC_CACHE_THRESHOLD or _query_keys[best] is None:
+        return None
+    return _cache_get(_query_keys[best])
+
+
+def clear_answer_cache() -> None:
+    global _query_vecs, _query_pos
+    _answer_cache.clear()
+    _query_vecs = None
+    _query_keys[:] = [None] * SEMANTIC_CACHE_SIZE
+    _query_pos = 0
+    logger.info("Answer cache cleared")
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
+_CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+# Token costs of the fixed context layout strings (separator, empty entry
+# headers), filled by warm_token_costs() so _build_context never loads the
+# tokenizer — which may need a network download — on the request path.
+_layout_tokens: dict[str, int] = {}
+
+
+def _entry_header(i: int, section_title: str, url: str) -> str:
+    return f"[{i}] Section: {section_title} | URL: {url}\n"
+
+
+def _layout_cost(text: str) -> int:
+    cost = _layout_tokens.get(text)
+    if cost is None:
+        cost = len(text) // 3 + 1   # not warmed up — rough, deliberately generous estimate
+    return cost
+
+
+def warm_token_costs() -> None:
+    enc     = get_token_encoding()
+    strings = [_CONTEXT_SEPARATOR] + [_entry_header(i, "", "") for i in range(1, TOP_K + 1)]
+    _layout_tokens.update({s: len(enc.encode_ordinary(s)) for s in strings})
+
+
 def _build_context(retrieved: list[tuple[dict, float]]) -> str:
-    parts = []
+    # Chunks arrive best-first; stop once the next one would exceed the token
+    # budget. Chunk, title and URL token counts come from ingest and layout
+    # costs from warm-up, so nothing is tokenised here. The top chunk is always kept.
+    sep_cost = _layout_cost(_CONTEXT_SEPARATOR)
+    parts    = []
+    used     = 0
     for i, (meta, score) in enumerate(retrieved, start=1):
-        parts.append(
-            f"[{i}] Section: {meta['section_title']} | URL: {meta['url']}\n{meta['text']}"
+        header = _entry_header(i, meta["section_title"], meta["url"])
+        cost   = (
+            _layout_cost(_entry_header(i, "", "")) + meta["title_tokens"] + meta["url_tokens"]
+            + meta["n_tokens"] + (sep_cost if parts else 0)
         )
-    return "\n\n---\n\n".join(parts)
+        if parts and used + cost > CONTEXT_TOKEN_BUDGET:
+            logger.info("Context budget reached — using %d of %d chunks", len(parts), len(retrieved))
+            break
+        parts.append(header + meta["text"])
+        used += cost
+    return _CONTEXT_SEPARATOR.join(parts)
 
 
 def _confidence_level(retrieved: list[tuple[dict, float]], answer: str) -> str:
@@ -77,13 +265,10 @@ def _build_sources(retrieved: list[tuple[dict, float]]) -> list[dict[str, str]]:
         if url in seen:
             continue
         seen.add(url)
-        snippet = meta["text"][:SNIPPET_LENGTH].strip()
-        if len(meta["text"]) > SNIPPET_LENGTH:
-            snippet += " …"
         sources.append({
             "url": url,
             "section_title": meta["section_title"],
-            "snippet": snippet,
+            "snippet": meta["snippet"],
         })
         if len(sources) >= MAX_SOURCES:
             break
@@ -92,39 +277,51 @@ def _build_sources(retrieved: list[tuple[dict, float]]) -> list[dict[str, str]]:
 
 # ── Query expansion ───────────────────────────────────────────────────────────
 
+_QUERY_EXPANSIONS = {
+    "client":    "clients projects work engagement AMNEX NMDPL",
+    "clients":   "clients projects work engagement AMNEX NMDPL",
+    "customer":  "clients projects work engagement",
+    "work":      "client engagement projects AMNEX NMDPL our work",
+    "project":   "client engagement projects our work",
+    "founder":   "founders directors managing director team",
+    "founders":  "founders directors managing director team",
+    "team":      "founders directors managing director team",
+    "about":     "about AKAR vision values founders directors",
+    "service":   "services solutions field research AI urban transformation",
+    "services":  "services solutions field research AI urban transformation",
+    "solution":  "services solutions capabilities",
+    "solutions": "services solutions capabilities",
+    "contact":   "contact us get in touch",
+    "price":     "pricing cost consultation contact",
+    "cost":      "pricing cost consultation contact",
+}
+
+# One alternation, longest keyword first. Anchored at the start of a word only,
+# so inflections ("projects", "customers") still match but "network" ≠ "work".
+_EXPANSION_RE = re.compile(
+    r"\b(" + "|".join(map(re.escape, sorted(_QUERY_EXPANSIONS, key=len, reverse=True))) + ")"
+)
+
+
+@functools.lru_cache(maxsize=4096)
 def _expand_query(question: str) -> str:
     """
     Expand short/vague queries with synonyms so embedding matches better.
     This runs locally — no extra API call.
     """
-    q = question.lower().strip()
-    expansions = {
-        "client":    "clients projects work engagement AMNEX NMDPL",
-        "clients":   "clients projects work engagement AMNEX NMDPL",
-        "customer":  "clients projects work engagement",
-        "work":      "client engagement projects AMNEX NMDPL our work",
-        "project":   "client engagement projects our work",
-        "founder":   "founders directors managing director team",
-        "founders":  "founders directors managing director team",
-        "team":      "founders directors managing director team",
-        "about":     "about AKAR vision values founders directors",
-        "service":   "services solutions field research AI urban transformation",
-        "services":  "services solutions field research AI urban transformation",
-        "solution":  "services solutions capabilities",
-        "solutions": "services solutions capabilities",
-        "contact":   "contact us get in touch",
-        "price":     "pricing cost consultation contact",
-        "cost":      "pricing cost consultation contact",
-    }
-    for keyword, expansion in expansions.items():
-        if keyword in q:
-            return f"{question} {expansion}"
+    match = _EXPANSION_RE.search(question.lower())
+    if match:
+        return f"{question} {_QUERY_EXPANSIONS[match.group(1)]}"
     return question
 
 
 # ── Warm-up ───────────────────────────────────────────────────────────────────
 
 def warmup(storage_dir: str) -> None:
+    try:
+        warm_token_costs()
+    except Exception as exc:
+        logger.warning("Tokenizer unavailable — context budget will use estimates: %s", exc)
     try:
         from app.services.index import get_cached_index
         get_openai_client()
@@ -136,44 +333,110 @@ def warmup(storage_dir: str) -> None:
 
 # ── Main entry ────────────────────────────────────────────────────────────────
 
-def answer_question(question: str, storage_dir: str) -> dict[str, Any]:
+def _replay(result: dict[str, Any]) -> list[dict[str, Any]]:
+    """Stream events for an answer that is already complete (cache hits)."""
+    return [
+        {"type": "sources", "sources": result["sources"]},
+        {"type": "token",   "data": result["answer"]},
+        {"type": "meta",    "sources": result["sources"], "confidence": result["confidence"]},
+    ]
+
+
+async def answer_question_stream(question: str, storage_dir: str) -> AsyncIterator[dict[str, Any]]:
+    """
+    Yield the answer as events:
+      {"type": "sources", "sources": [...]}                     — as soon as retrieval finishes
+      {"type": "token",   "data": "..."}                        — one per LLM delta
+      {"type": "meta",    "sources": [...], "confidence": "..."} — once the answer is complete
+    """
     client = get_openai_client()
 
+    # Exact-match cache — no OpenAI calls at all
+    key    = _cache_key(question)
+    cached = _cache_get(key)
+    if cached is not None:
+        logger.info("Answer cache hit (exact)")
+        for event in _replay(cached):
+            yield event
+        return
+
     # Expand short queries before embedding
     expanded_query = _expand_query(question)
     if expanded_query != question:
         logger.info("Query expanded: %r → %r", question, expanded_query)
 
+    # Semantic cache — paraphrases of a recent question skip the LLM call
+    q_vec  = await embed_query(expanded_query)
+    cached = _semantic_cache_get(q_vec)
+    if cached is not None:
+        logger.info("Answer cache hit (semantic)")
+        _cache_put(key, cached, q_vec)
+        for event in _replay(cached):
+            yield event
+        return
+
     # Retrieve
-    retrieved = similarity_search(expanded_query, storage_dir, top_k=TOP_K)
+    retrieved = await similarity_search(expanded_query, storage_dir, top_k=TOP_K, q_vec=q_vec)
     logger.info(
         "Retrieved %d chunks. Top score=%.4f",
         len(retrieved),
         retrieved[0][1] if retrieved else 0.0,
     )
 
+    # Sources only depend on retrieval — send them before the first token
+    sources = _build_sources(retrieved)
+    yield {"type": "sources", "sources": sources}
+
     # Build prompt
     context = _build_context(retrieved)
-    system_content = SYSTEM_PROMPT_TEMPLATE.format(
-        context=context,
-        not_found=NOT_FOUND_PHRASE,
-    )
 
-    # Call LLM
-    response = client.chat.completions.create(
+    # Call LLM — static system prompt first so it forms a cacheable prefix
+    stream = await client.chat.completions.create(
         model=CHAT_MODEL,
         messages=[
-            {"role": "system", "content": system_content},
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user",   "content": CONTEXT_MESSAGE_PREFIX + context},
             {"role": "user",   "content": question},
         ],
         temperature=0.2,
         max_tokens=500,
+        stream=True,
     )
-    answer = response.choices[0].message.content.strip()
+    parts: list[str] = []
+    # Closing on exit releases the upstream completion and its pooled connection
+    # when the client disconnects or an error interrupts the stream.
+    async with stream:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield {"type": "token", "data": delta}
+
+    answer = "".join(parts).strip()
     logger.info("LLM answer (first 120 chars): %r", answer[:120])
 
-    return {
+    result = {
         "answer":     answer,
-        "sources":    _build_sources(retrieved),
+        "sources":    sources,
         "confidence": _confidence_level(retrieved, answer),
-    }
\ No newline at end of file
+    }
+    _cache_put(key, result, q_vec)
+    yield {"type": "meta", "sources": sources, "confidence": result["confidence"]}
+
+
+async def answer_question(question: str, storage_dir: str) -> dict[str, Any]:
+    """Non-streaming variant — drains answer_question_stream into one result dict."""
+    parts: list[str] = []
+    meta: dict[str, Any] = {}
+    async for event in answer_question_stream(question, storage_dir):
+        if event["type"] == "token":
+            parts.append(event["data"])
+        elif event["type"] == "meta":
+            meta = event
+    return {
+        "answer":     "".join(parts).strip(),
+        "sources":    meta["sources"],
+        "confidence": meta["confidence"],
+    }
@@ -0,0 +1,50 @@
+import re as stdlib_re
+
+import pytest
+
+from app.services.pdf_parser import _SECTION_HEADER_RE, _match_header
+
+
+@pytest.mark.parametrize(
+    "line, title, url",
+    [
+        ("HERO PAGE ( https://akar.example )", "HERO PAGE", "https://akar.example"),
+        ("About Us (https://akar.example/about)", "About Us", "https://akar.example/about"),
+        # Non-ASCII spaces are common in PDF text; re2's \s does not match them
+        ("Title\xa0(\xa0https://x.y\xa0)", "Title", "https://x.y"),
+        ("Our\u2009Services (\u2009https://x.y/services )", "Our Services", "https://x.y/services"),
+        ("Contact (\u202fhttps://x.y/contact\u202f)", "Contact", "https://x.y/contact"),
+    ],
+)
+def test_header_matches(line, title, url):
+    match = _match_header(line)
+    assert match is not None
+    assert match.group("title").strip() == title
+    assert match.group("url") == url
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "Plain body text without a link",
+        "See https://x.y for details",
+        "Title ( ftp://x.y )",
+    ],
+)
+def test_body_lines_do_not_match(line):
+    assert _match_header(line) is None
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "Title\xa0(\xa0https://x.y\xa0)",
+        "Title\u2009(\u202fhttps://x.y )",
+        "Title\u3000( https://x.y )",
+    ],
+)
+def test_matches_stdlib_re(line):
+    reference = stdlib_re.compile(_SECTION_HEADER_RE.pattern).match(line)
+    match     = _match_header(line)
+    assert (match is None) == (reference is None)
+    assert match.group("url") == reference.group("url")